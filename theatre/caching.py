@@ -0,0 +1,81 @@
+import hashlib
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+
+def representation_cache_key(model, pk) -> str:
+    return f"{model._meta.model_name}:{pk}:v1"
+
+
+def list_version_key(model) -> str:
+    return f"{model._meta.model_name}:list:version"
+
+
+def bump_list_version(model) -> None:
+    key = list_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+class CachedListMixin:
+    """
+    Serve list pages from per-object cached representations.
+
+    Only primary keys are read for the requested page; objects missing
+    from the cache are serialized in one query and stored for later
+    requests. Entries are invalidated by the receivers in theatre.signals.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        pks = queryset.values_list("pk", flat=True)
+        page = self.paginate_queryset(pks)
+        data = self.get_cached_representations(
+            queryset, list(pks if page is None else page)
+        )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def get_cached_representations(self, queryset, pks):
+        keys = {pk: representation_cache_key(queryset.model, pk) for pk in pks}
+        cached = cache.get_many(keys.values())
+
+        missing = [pk for pk in pks if keys[pk] not in cached]
+        if missing:
+            serializer = self.get_serializer(
+                queryset.filter(pk__in=missing), many=True
+            )
+            fresh = {keys[item["id"]]: item for item in serializer.data}
+            cache.set_many(fresh)
+            cached.update(fresh)
+
+        return [cached[keys[pk]] for pk in pks]
+
+
+class CachedListResponseMixin(CachedListMixin):
+    """
+    Cache whole list responses for slowly-changing reference data.
+
+    Keys include a per-model version that is bumped whenever an object of
+    that model is saved or deleted, so stale pages are never served.
+    """
+
+    list_cache_timeout = 60 * 5
+
+    def list(self, request, *args, **kwargs):
+        model = self.queryset.model
+        version = cache.get_or_set(list_version_key(model), 0, None)
+        url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        key = f"{model._meta.model_name}:list:{version}:{url_hash}"
+
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, self.list_cache_timeout)
+        return response
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
+
+from theatre.models import Reservation, Ticket
+
+
+class Command(BaseCommand):
+    help = "Copy the reservation owner onto Ticket.user for reserved tickets."
+
+    def handle(self, *args, **options):
+        owner = Reservation.objects.filter(pk=OuterRef("reservation_id")).values("user_id")
+        updated = Ticket.objects.filter(reservation__isnull=False).update(
+            user=Subquery(owner)
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} tickets."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from theatre.models import Performance
+
+
+class Command(BaseCommand):
+    help = "Recompute Performance.tickets_sold from the tickets table."
+
+    def handle(self, *args, **options):
+        updated = Performance.objects.recount_tickets_sold()
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} performances."))
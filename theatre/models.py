@@ -1,12 +1,16 @@
 import pathlib
 import uuid
+from datetime import timedelta
+from functools import cached_property
 from typing import Type
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from django.db.models import UniqueConstraint
+from django.db.models import Count, F, OuterRef, Subquery, UniqueConstraint
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
-from django.utils.text import slugify
+
+_RESERVATION_CUTOFF = timedelta(minutes=15)
 
 
 class TheatreHall(models.Model):
@@ -14,7 +18,7 @@ class TheatreHall(models.Model):
     rows = models.IntegerField()
     seats_in_row = models.IntegerField()
 
-    @property
+    @cached_property
     def capacity(self) -> int:
         return self.rows * self.seats_in_row
 
@@ -29,7 +33,7 @@ class Actor(models.Model):
     def __str__(self):
         return self.full_name
 
-    @property
+    @cached_property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -52,20 +56,38 @@ class Play(models.Model):
         return self.title
 
 def movie_image_path(instance, filename) -> pathlib.Path:
-    filename = f"{slugify(instance.title)}-{uuid.uuid4()}{pathlib.Path(filename).suffix}"
+    filename = f"performance-{instance.pk}-{uuid.uuid4()}{pathlib.Path(filename).suffix}"
     return pathlib.Path("uploads/performances/") / filename
 
 
+class PerformanceQuerySet(models.QuerySet):
+    def recount_tickets_sold(self) -> int:
+        """Recompute tickets_sold from the tickets table."""
+        sold = (
+            Ticket.objects.filter(performance=OuterRef("pk"))
+            .order_by()
+            .values("performance")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return self.update(
+            tickets_sold=Coalesce(Subquery(sold), 0), updated_at=timezone.now()
+        )
+
+
 class Performance(models.Model):
     play = models.ForeignKey(Play, on_delete=models.CASCADE, related_name="performances")
     theatre_hall = models.ForeignKey(TheatreHall, on_delete=models.CASCADE, related_name="performances")
-    show_time = models.DateTimeField()
+    show_time = models.DateTimeField(db_index=True)
     image = models.ImageField(null=True, upload_to=movie_image_path)
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        if self.show_time and self.show_time < timezone.now():
-            raise ValidationError("The display time cannot be in the past.")
-        super().save(*args, **kwargs)
+    objects = PerformanceQuerySet.as_manager()
+
+    @property
+    def tickets_available(self) -> int:
+        return self.theatre_hall.capacity - self.tickets_sold
 
     class Meta:
         constraints = [
@@ -80,35 +102,123 @@ class Reservation(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="reservations")
     performance = models.ForeignKey(Performance, on_delete=models.CASCADE, related_name="reservations")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-id"], name="res_user_id_desc_idx")
+        ]
+
+
+class TicketQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # Keep the denormalized owner in sync for bulk updates, including the
+        # reverse manager's add()/set()/remove()/clear(), which bypass save().
+        reservation_key = next(
+            (key for key in ("reservation", "reservation_id") if key in kwargs), None
+        )
+        if reservation_key and "user" not in kwargs and "user_id" not in kwargs:
+            reservation = kwargs[reservation_key]
+            if reservation is None:
+                kwargs["user_id"] = None
+            elif isinstance(reservation, Reservation):
+                kwargs["user_id"] = reservation.user_id
+            else:
+                kwargs["user_id"] = Subquery(
+                    Reservation.objects.filter(pk=reservation).values("user_id")[:1]
+                )
+        if "performance" not in kwargs and "performance_id" not in kwargs:
+            return super().update(**kwargs)
+
+        # Moving tickets changes the counters on both sides.
+        with transaction.atomic():
+            pks = list(self.values_list("pk", flat=True))
+            performance_ids = set(self.values_list("performance_id", flat=True))
+            updated = super().update(**kwargs)
+            performance_ids.update(
+                Ticket.objects.filter(pk__in=pks).values_list("performance_id", flat=True)
+            )
+            Performance.objects.filter(pk__in=performance_ids).recount_tickets_sold()
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic():
+            objs = super().bulk_create(objs, *args, **kwargs)
+            Performance.objects.filter(
+                pk__in={obj.performance_id for obj in objs}
+            ).recount_tickets_sold()
+        return objs
+
 
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
-    performance = models.ForeignKey(Performance, on_delete=models.CASCADE, related_name="tickets")
+    # Lookups by performance are served by the unique_ticket index,
+    # which leads with performance_id.
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="tickets", db_index=False
+    )
     reservation = models.ForeignKey(Reservation, null=True, blank=True, on_delete=models.CASCADE, related_name="tickets")
-
-    def clean(self):
-        if self.performance.show_time - timezone.now() < timezone.timedelta(minutes=15):
-            raise ValidationError("Reservations cannot be made less than 15 minutes before the performance.")
+    # Copied from reservation.user so ticket listings filter without a join.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="tickets",
+        db_index=False,
+    )
+
+    objects = TicketQuerySet.as_manager()
+
+    def clean(self, now=None):
+        Ticket.validate_show_time(self.performance, ValidationError, now)
         Ticket.validate_seat(self.seat, self.row, self.performance, ValidationError)
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        self.user_id = self.reservation.user_id if self.reservation_id else None
+        with transaction.atomic():
+            if self._state.adding:
+                previous_performance_id = None
+            else:
+                previous_performance_id = (
+                    Ticket.objects.filter(pk=self.pk)
+                    .values_list("performance_id", flat=True)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            # Touch updated_at as well: it backs the performance ETag/Last-Modified.
+            now = timezone.now()
+            if previous_performance_id == self.performance_id:
+                Performance.objects.filter(pk=self.performance_id).update(updated_at=now)
+                return
+            Performance.objects.filter(pk=self.performance_id).update(
+                tickets_sold=F("tickets_sold") + 1, updated_at=now
+            )
+            if previous_performance_id is not None:
+                Performance.objects.filter(pk=previous_performance_id).update(
+                    tickets_sold=Greatest(F("tickets_sold") - 1, 0), updated_at=now
+                )
+
+    @staticmethod
+    def validate_show_time(
+        performance: Performance, error_to_raise: Type[BaseException], now=None
+    ) -> None:
+        if now is None:
+            now = timezone.now()
+        if performance.show_time - now < _RESERVATION_CUTOFF:
+            raise error_to_raise("Reservations cannot be made less than 15 minutes before the performance.")
 
     @staticmethod
     def validate_seat(seat: int, row: int, performance: Performance, error_to_raise: Type[BaseException]) -> None:
-        for ticket_attr_value, ticket_attr_name, theatre_hall_attr_name in [
-            (row, "row", "rows"),
-            (seat, "seat", "seats_in_row"),
-        ]:
-            count_attrs = getattr(performance.theatre_hall, theatre_hall_attr_name)
-            if not (1 <= ticket_attr_value <= count_attrs):
-                raise error_to_raise(
-                    {
-                        ticket_attr_name: f"{ticket_attr_name} number must be in available range: (1, {count_attrs})"
-                    }
-                )
+        hall = performance.theatre_hall
+        if not (1 <= row <= hall.rows):
+            raise error_to_raise(
+                {"row": f"row number must be in available range: (1, {hall.rows})"}
+            )
+        if not (1 <= seat <= hall.seats_in_row):
+            raise error_to_raise(
+                {"seat": f"seat number must be in available range: (1, {hall.seats_in_row})"}
+            )
 
     def __str__(self):
         return f"{str(self.performance)} (row: {self.row}, seat: {self.seat})"
@@ -120,3 +230,7 @@ class Ticket(models.Model):
                 name="unique_ticket"
             )
         ]
+        indexes = [
+            models.Index(fields=["user", "performance"], name="ticket_user_perf_idx")
+        ]
+        base_manager_name = "objects"
@@ -1,15 +1,26 @@
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field, inline_serializer
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
 
 from theatre.models import TheatreHall, Actor, Genre, Play, Performance, Reservation, Ticket
 
+RESERVATION_CREATED_AT_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def _context_now(context: dict):
+    """Read the clock once per serializer tree and reuse it for every check."""
+    if "_now" not in context:
+        context["_now"] = timezone.now()
+    return context["_now"]
+
 
 class TheatreHallSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TheatreHall
-        fields = '__all__'
+        fields = ("id", "name", "rows", "seats_in_row", "capacity")
 
 
 class ActorSerializer(serializers.ModelSerializer):
@@ -27,8 +38,8 @@ class GenreSerializer(serializers.ModelSerializer):
 
 class PlaySerializer(serializers.ModelSerializer):
 
-    actors = ActorSerializer(many=True, read_only=True)
-    genres = GenreSerializer(many=True, read_only=True)
+    actors = serializers.SerializerMethodField()
+    genres = serializers.SerializerMethodField()
 
     class Meta:
         model = Play
@@ -41,6 +52,32 @@ class PlaySerializer(serializers.ModelSerializer):
             "duration"
         )
 
+    @extend_schema_field(
+        inline_serializer(
+            name="PlayActor",
+            fields={
+                "id": serializers.IntegerField(),
+                "full_name": serializers.CharField(),
+            },
+            many=True,
+        )
+    )
+    def get_actors(self, obj):
+        return [
+            {"id": actor.id, "full_name": actor.full_name}
+            for actor in obj.actors.all()
+        ]
+
+    @extend_schema_field(
+        inline_serializer(
+            name="PlayGenre",
+            fields={"id": serializers.IntegerField(), "name": serializers.CharField()},
+            many=True,
+        )
+    )
+    def get_genres(self, obj):
+        return [{"id": genre.id, "name": genre.name} for genre in obj.genres.all()]
+
 
 class PerformanceSerializer(serializers.ModelSerializer):
     play_title = serializers.CharField(source="play.title", read_only=True)
@@ -61,11 +98,16 @@ class PerformanceSerializer(serializers.ModelSerializer):
             "image"
         )
 
+    def validate_show_time(self, value):
+        if value < _context_now(self.context):
+            raise serializers.ValidationError("The display time cannot be in the past.")
+        return value
+
 
 class PerformanceListSerializer(serializers.ModelSerializer):
-    play_title = serializers.CharField(source="play.title", read_only=True)
-    theatre_hall_name = serializers.CharField(source="theatre_hall.name", read_only=True)
-    show_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M")
+    play_title = serializers.CharField(read_only=True)
+    theatre_hall_name = serializers.CharField(read_only=True)
+    show_time = serializers.SerializerMethodField()
 
     class Meta:
         model = Performance
@@ -74,20 +116,37 @@ class PerformanceListSerializer(serializers.ModelSerializer):
             "show_time",
             "play_title",
             "theatre_hall_name",
+            "tickets_available",
             "image",
         )
 
+    def get_show_time(self, obj) -> str:
+        return obj.show_time.strftime("%Y-%m-%d %H:%M")
+
 
 class PerformanceDetailSerializer(serializers.ModelSerializer):
-    taken_places = serializers.ListField(child=serializers.DictField())
-    play_title = serializers.CharField(source="play.title", read_only=True)
-    theatre_hall_name = serializers.CharField(source="theatre_hall.name", read_only=True)
-    show_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M")
+    taken_places = serializers.SerializerMethodField()
+    play_title = serializers.CharField(read_only=True)
+    theatre_hall_name = serializers.CharField(read_only=True)
+    show_time = serializers.SerializerMethodField()
 
     class Meta:
         model = Performance
         fields = ("id", "show_time", "play", "theatre_hall", "taken_places", "play_title", "theatre_hall_name")
 
+    def get_show_time(self, obj) -> str:
+        return obj.show_time.strftime("%Y-%m-%d %H:%M")
+
+    @extend_schema_field(
+        inline_serializer(
+            name="TakenPlace",
+            fields={"row": serializers.IntegerField(), "seat": serializers.IntegerField()},
+            many=True,
+        )
+    )
+    def get_taken_places(self, obj):
+        return [{"row": ticket.row, "seat": ticket.seat} for ticket in obj.tickets.all()]
+
 
 class PerformanceImageSerializer(serializers.ModelSerializer):
     class Meta:
@@ -110,20 +169,36 @@ class TicketSerializer(serializers.ModelSerializer):
             "performance_title"
         )
 
-        def validate(self, attrs):
-            performance = attrs.get("performance")
-            if performance:
-                ticket = Ticket(**attrs)
-                try:
-                    ticket.full_clean()
-                except ValidationError as e:
-                    raise serializers.ValidationError(str(e))
-            return attrs
+    def validate(self, attrs):
+        performance = attrs.get("performance", getattr(self.instance, "performance", None))
+        if performance:
+            Ticket.validate_show_time(
+                performance, serializers.ValidationError, _context_now(self.context)
+            )
+            Ticket.validate_seat(
+                attrs.get("seat", getattr(self.instance, "seat", None)),
+                attrs.get("row", getattr(self.instance, "row", None)),
+                performance,
+                serializers.ValidationError,
+            )
+        return attrs
+
+
+class ReservationTicketSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    row = serializers.IntegerField(read_only=True)
+    seat = serializers.IntegerField(read_only=True)
+    performance = serializers.IntegerField(read_only=True)
+    performance_title = serializers.CharField(read_only=True)
 
 
 class ReservationListSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=True)
-    created_at = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%S.%fZ")
+    """Render the row dicts built by ReservationViewSet.list."""
+
+    tickets = ReservationTicketSerializer(many=True, read_only=True)
+    created_at = serializers.DateTimeField(
+        format=RESERVATION_CREATED_AT_FORMAT, read_only=True
+    )
 
     class Meta:
         model = Reservation
@@ -131,31 +206,99 @@ class ReservationListSerializer(serializers.ModelSerializer):
 
 
 class ReservationSerializer(serializers.ModelSerializer):
-    tickets = serializers.PrimaryKeyRelatedField(many=True, queryset=Ticket.objects.all())
+    tickets = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, write_only=True
+    )
     performance = serializers.PrimaryKeyRelatedField(queryset=Performance.objects.all())
 
     class Meta:
         model = Reservation
         fields = ["id", "user", "performance", "tickets"]
+        read_only_fields = ["user"]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data["tickets"] = list(instance.tickets.values_list("id", flat=True))
+        return data
+
+    def validate(self, attrs):
+        if "tickets" not in attrs:
+            # Partial update that keeps the current tickets.
+            performance = attrs.get("performance")
+            if performance and self.instance.tickets.exclude(performance=performance).exists():
+                raise serializers.ValidationError(
+                    {"performance": "The reserved tickets are for another performance."}
+                )
+            return attrs
 
+        ticket_ids = set(attrs["tickets"])
+        performance = attrs.get("performance", getattr(self.instance, "performance", None))
+        own_reservation_id = getattr(self.instance, "pk", None)
+        tickets = list(
+            Ticket.objects.select_related("performance__theatre_hall").filter(
+                id__in=ticket_ids
+            )
+        )
+        if len(tickets) != len(ticket_ids):
+            raise serializers.ValidationError({"tickets": "Some tickets do not exist."})
+        if any(ticket.performance_id != performance.id for ticket in tickets):
+            raise serializers.ValidationError(
+                {"tickets": "All tickets must be for the same performance."}
+            )
+        taken = sorted(
+            ticket.id
+            for ticket in tickets
+            if ticket.reservation_id not in (None, own_reservation_id)
+        )
+        if taken:
+            raise serializers.ValidationError(
+                {"tickets": f"Tickets are already reserved: {taken}"}
+            )
+
+        performance = tickets[0].performance
+        Ticket.validate_show_time(
+            performance, serializers.ValidationError, _context_now(self.context)
+        )
+        for ticket in tickets:
+            Ticket.validate_seat(
+                ticket.seat, ticket.row, performance, serializers.ValidationError
+            )
+
+        attrs["tickets"] = ticket_ids
+        attrs["performance"] = performance
+        return attrs
 
     def create(self, validated_data):
         user = self.context["request"].user
-        tickets_data = validated_data.pop("tickets")
+        ticket_ids = validated_data.pop("tickets")
         performance = validated_data.pop("performance")
 
-        tickets = Ticket.objects.filter(id__in=[ticket.id for ticket in tickets_data])
-        for ticket in tickets:
-            if ticket.performance != performance:
-                raise serializers.ValidationError("All tickets must be for the same performance.")
-
         with transaction.atomic():
-            reservation = Reservation.objects.create(user=user)
-            for ticket in tickets:
-                ticket.reservation = reservation
-                ticket.performance = performance
-                ticket.full_clean()
-                ticket.save()
+            reservation = Reservation.objects.create(user=user, performance=performance)
+            self._attach_tickets(reservation, ticket_ids)
 
         return reservation
 
+    def update(self, instance, validated_data):
+        ticket_ids = validated_data.pop("tickets", None)
+
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if ticket_ids is not None:
+                Ticket.objects.filter(reservation=instance).exclude(
+                    id__in=ticket_ids
+                ).update(reservation=None)
+                self._attach_tickets(instance, ticket_ids)
+
+        return instance
+
+    @staticmethod
+    def _attach_tickets(reservation, ticket_ids):
+        """Attach free tickets (or the reservation's own) with one conditional UPDATE."""
+        reserved = Ticket.objects.filter(
+            Q(reservation__isnull=True) | Q(reservation=reservation), id__in=ticket_ids
+        ).update(reservation=reservation)
+        if reserved != len(ticket_ids):
+            raise serializers.ValidationError(
+                {"tickets": "Some tickets were reserved concurrently."}
+            )
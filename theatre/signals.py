@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+from django.utils import timezone
+
+from theatre.caching import bump_list_version, representation_cache_key
+from theatre.models import Actor, Genre, Performance, Play, TheatreHall, Ticket
+
+
+@receiver(post_save, sender=Play)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=TheatreHall)
+@receiver(post_delete, sender=Play)
+@receiver(post_delete, sender=Actor)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=TheatreHall)
+def invalidate_representation(sender, instance, **kwargs):
+    cache.delete(representation_cache_key(sender, instance.pk))
+    bump_list_version(sender)
+
+
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Actor)
+@receiver(pre_delete, sender=Genre)
+def invalidate_related_plays(sender, instance, **kwargs):
+    """Plays embed their actors and genres, so drop the plays as well."""
+    if kwargs.get("created"):
+        return
+    cache.delete_many(
+        [
+            representation_cache_key(Play, pk)
+            for pk in instance.plays.values_list("pk", flat=True)
+        ]
+    )
+
+
+@receiver(m2m_changed, sender=Play.actors.through)
+@receiver(m2m_changed, sender=Play.genres.through)
+def invalidate_play_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            cache.delete(representation_cache_key(Play, instance.pk))
+    elif action == "pre_clear":
+        invalidate_related_plays(type(instance), instance)
+    elif action in ("post_add", "post_remove"):
+        cache.delete_many([representation_cache_key(Play, pk) for pk in pk_set])
+
+
+@receiver(post_save, sender=Play)
+@receiver(post_save, sender=TheatreHall)
+def touch_performances(sender, instance, created, **kwargs):
+    """Performances render play and hall fields, so move their validators too."""
+    if created:
+        return
+    lookup = "play" if sender is Play else "theatre_hall"
+    Performance.objects.filter(**{lookup: instance}).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Ticket)
+def decrement_tickets_sold(sender, instance, **kwargs):
+    # Clamp at zero so a counter that drifted low cannot fail the delete.
+    Performance.objects.filter(pk=instance.performance_id).update(
+        tickets_sold=Greatest(F("tickets_sold") - 1, 0), updated_at=timezone.now()
+    )
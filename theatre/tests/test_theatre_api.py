@@ -1,5 +1,9 @@
+import tempfile
+
+from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APIClient
@@ -52,6 +56,7 @@ def sample_ticket(performance, seat="A1"):
 
 class PlayAPITests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_superuser(
             "admin@theater.com", "password"
@@ -96,9 +101,50 @@ class PlayAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('duration', res.data)
 
+    def test_list_plays_with_shared_actor(self):
+        """Test the same actor is rendered in every play they appear in"""
+        actor = sample_actor()
+        self.play_one.actors.add(actor)
+        self.play_two.actors.add(actor)
+
+        res = self.client.get(PLAY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for play in res.data["results"]:
+            self.assertEqual(play["actors"][0]["full_name"], actor.full_name)
+
+    def test_list_plays_after_actor_rename(self):
+        """Test renaming an actor refreshes the cached plays"""
+        actor = sample_actor()
+        self.play_one.actors.add(actor)
+        self.client.get(PLAY_URL)
+
+        actor.first_name = "Brad"
+        actor.save()
+        res = self.client.get(PLAY_URL)
+
+        play = next(play for play in res.data["results"] if play["id"] == self.play_one.id)
+        self.assertEqual(play["actors"][0]["full_name"], "Brad Clooney")
+
+    def test_list_plays_after_genre_changes(self):
+        """Test adding and clearing genres refreshes the cached plays"""
+        genre = sample_genre()
+        self.client.get(PLAY_URL)
+
+        self.play_one.genres.add(genre)
+        res = self.client.get(PLAY_URL)
+        play = next(play for play in res.data["results"] if play["id"] == self.play_one.id)
+        self.assertEqual(play["genres"], [{"id": genre.id, "name": genre.name}])
+
+        genre.plays.clear()
+        res = self.client.get(PLAY_URL)
+        play = next(play for play in res.data["results"] if play["id"] == self.play_one.id)
+        self.assertEqual(play["genres"], [])
+
 
 class ActorAPITests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_superuser(
             "admin@theater.com", "password"
@@ -136,6 +182,21 @@ class ActorAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("first_name", res.data)
 
+    def test_list_actors_after_create(self):
+        """Test the cached actor list includes newly created actors"""
+        self.client.post(self.actor_url, {"first_name": "Brad", "last_name": "Pitt"})
+        res = self.client.get(self.actor_url)
+        self.assertEqual(res.data["count"], 1)
+
+        self.client.post(self.actor_url, {"first_name": "Tom", "last_name": "Hanks"})
+        res = self.client.get(self.actor_url)
+
+        self.assertEqual(res.data["count"], 2)
+        self.assertEqual(
+            sorted(actor["full_name"] for actor in res.data["results"]),
+            ["Brad Pitt", "Tom Hanks"],
+        )
+
 class PerformanceAPITests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -165,6 +226,123 @@ class PerformanceAPITests(TestCase):
         performance = Performance.objects.get(play=self.play)
         self.assertEqual(performance.theatre_hall, hall)
 
+    def test_list_performances_num_queries(self):
+        """Test listing performances does not query per row"""
+        hall = TheatreHall.objects.create(name="Main Hall", rows=2, seats_in_row=2)
+        for days in range(1, 4):
+            play = sample_play(title=f"Play {days}")
+            play.actors.add(sample_actor(first_name=f"Actor {days}"))
+            Performance.objects.create(
+                play=play,
+                theatre_hall=hall,
+                show_time=timezone.now() + timedelta(days=days),
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(self.performance_url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 3)
+
+    def test_list_performances_filter_by_date(self):
+        """Test the date filter only returns performances on that day"""
+        hall = TheatreHall.objects.create(name="Main Hall", rows=2, seats_in_row=2)
+        tomorrow = timezone.now() + timedelta(days=1)
+        on_date = Performance.objects.create(play=self.play, theatre_hall=hall, show_time=tomorrow)
+        Performance.objects.create(
+            play=self.play, theatre_hall=hall, show_time=tomorrow + timedelta(days=2)
+        )
+
+        res = self.client.get(self.performance_url, {"date": tomorrow.date().isoformat()})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in res.data["results"]], [on_date.id])
+
+    def test_list_performances_invalid_date(self):
+        """Test malformed and impossible dates are both rejected"""
+        for date in ("not-a-date", "2024-02-30"):
+            res = self.client.get(self.performance_url, {"date": date})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_performances_invalid_ids(self):
+        """Test non-numeric play and theatre hall ids are rejected"""
+        for params in ({"play": "abc"}, {"theatre_hall": "abc"}):
+            res = self.client.get(self.performance_url, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_performance_not_modified(self):
+        """Test a matching ETag returns 304 until a ticket is sold"""
+        hall = TheatreHall.objects.create(name="Main Hall", rows=2, seats_in_row=2)
+        performance = Performance.objects.create(
+            play=self.play, theatre_hall=hall, show_time=timezone.now() + timedelta(days=1)
+        )
+        url = reverse("theatre:performance-detail", args=[performance.id])
+
+        etag = self.client.get(url)["ETag"]
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Ticket.objects.create(row=1, seat=1, performance=performance)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_places"], [{"row": 1, "seat": 1}])
+
+    def test_list_performances_not_modified(self):
+        """Test the list ETag holds until a performance or its play changes"""
+        hall = TheatreHall.objects.create(name="Main Hall", rows=2, seats_in_row=2)
+        Performance.objects.create(
+            play=self.play, theatre_hall=hall, show_time=timezone.now() + timedelta(days=1)
+        )
+
+        etag = self.client.get(self.performance_url)["ETag"]
+        res = self.client.get(self.performance_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.play.title = "Renamed Play"
+        self.play.save()
+        res = self.client.get(self.performance_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["play_title"], "Renamed Play")
+
+    def test_upload_image_changes_etag(self):
+        """Test uploading an image invalidates the detail and list ETags"""
+        hall = TheatreHall.objects.create(name="Main Hall", rows=2, seats_in_row=2)
+        performance = Performance.objects.create(
+            play=self.play, theatre_hall=hall, show_time=timezone.now() + timedelta(days=1)
+        )
+        detail_url = reverse("theatre:performance-detail", args=[performance.id])
+        upload_url = reverse("theatre:performance-upload-image", args=[performance.id])
+        detail_etag = self.client.get(detail_url)["ETag"]
+        list_etag = self.client.get(self.performance_url)["ETag"]
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+                Image.new("RGB", (10, 10)).save(image_file, format="JPEG")
+                image_file.seek(0)
+                res = self.client.post(upload_url, {"image": image_file}, format="multipart")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            res = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            res = self.client.get(self.performance_url, HTTP_IF_NONE_MATCH=list_etag)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_performance_invalid_pk(self):
+        """Test a non-numeric performance id returns 404"""
+        url = reverse("theatre:performance-detail", args=["abc"])
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_upload_image_invalid_pk(self):
+        """Test a non-numeric performance id returns 404"""
+        url = reverse("theatre:performance-upload-image", args=["abc"])
+        res = self.client.post(url, {})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_create_performance_without_play(self):
         payload = {
             "show_time": "2024-06-02 14:00:00",
@@ -186,6 +364,19 @@ class PerformanceAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("show_time", res.data)
 
+    def test_create_performance_in_the_past(self):
+        hall = TheatreHall.objects.create(name="Main Hall", rows=2, seats_in_row=2)
+        past_time = timezone.now() - timedelta(days=1)
+        payload = {
+            "show_time": past_time.strftime("%Y-%m-%d %H:%M"),
+            "play": self.play.id,
+            "theatre_hall": hall.id,
+        }
+        res = self.client.post(self.performance_url, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("show_time", res.data)
+
     def test_create_performance_with_invalid_theatre_hall(self):
         """Test creating a performance with an invalid theatre hall"""
         payload = {
@@ -200,6 +391,7 @@ class PerformanceAPITests(TestCase):
 
 class TheatreHallAPITests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_superuser(
             "admin@theater.com", "password"
@@ -276,6 +468,28 @@ class ReservationAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data["results"]), 1)
         self.assertEqual(response.data["results"][0]["id"], reservation.id)
+        tickets = {ticket["id"]: ticket for ticket in response.data["results"][0]["tickets"]}
+        self.assertEqual(
+            tickets[self.ticket1.id],
+            {
+                "id": self.ticket1.id,
+                "row": self.ticket1.row,
+                "seat": self.ticket1.seat,
+                "performance": self.performance.id,
+                "performance_title": self.performance.play.title,
+            },
+        )
+
+    def test_list_reservations_num_queries(self):
+        """Test listing reservations does not query per ticket."""
+        reservation = Reservation.objects.create(user=self.user, performance=self.performance)
+        reservation.tickets.set([self.ticket1, self.ticket2])
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"][0]["tickets"]), 2)
 
     def test_cancel_reservation(self):
         """Test deleting a reservation successfully."""
@@ -294,6 +508,131 @@ class ReservationAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Reservation.objects.count(), 0)
 
+    def test_create_reservation(self):
+        """Test reserving tickets attaches them to the reservation and user."""
+        data = {
+            "performance": self.performance.id,
+            "tickets": [self.ticket1.id, self.ticket2.id],
+        }
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(id=response.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(sorted(response.data["tickets"]), [self.ticket1.id, self.ticket2.id])
+        for ticket in (self.ticket1, self.ticket2):
+            ticket.refresh_from_db()
+            self.assertEqual(ticket.reservation, reservation)
+            self.assertEqual(ticket.user, self.user)
+
+    def test_list_tickets_after_reservation(self):
+        """Test reserved tickets show up in the user's ticket list."""
+        data = {
+            "performance": self.performance.id,
+            "tickets": [self.ticket1.id],
+        }
+        self.client.post(self.url, data, format="json")
+        reservation = Reservation.objects.create(user=self.user, performance=self.performance)
+        reservation.tickets.add(self.ticket2)
+
+        response = self.client.get(TICKET_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(ticket["id"] for ticket in response.data["results"]),
+            [self.ticket1.id, self.ticket2.id],
+        )
+
+    def test_ticket_user_follows_reservation_pk_updates(self):
+        """Test bulk updates by reservation pk keep the ticket owner in sync."""
+        reservation = Reservation.objects.create(user=self.user, performance=self.performance)
+
+        Ticket.objects.filter(pk=self.ticket1.pk).update(reservation_id=reservation.pk)
+        Ticket.objects.filter(pk=self.ticket2.pk).update(reservation=reservation.pk)
+
+        response = self.client.get(TICKET_URL)
+        self.assertEqual(
+            sorted(ticket["id"] for ticket in response.data["results"]),
+            [self.ticket1.id, self.ticket2.id],
+        )
+
+    def test_create_reservation_already_reserved(self):
+        """Test tickets that already belong to a reservation are rejected."""
+        reservation = Reservation.objects.create(user=self.user, performance=self.performance)
+        reservation.tickets.add(self.ticket1)
+        data = {
+            "performance": self.performance.id,
+            "tickets": [self.ticket1.id, self.ticket2.id],
+        }
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tickets", response.data)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_create_reservation_other_performance(self):
+        """Test tickets must belong to the requested performance."""
+        play = Play.objects.create(title="Other Play", description="Other", duration=90)
+        other = Performance.objects.create(
+            play=play,
+            theatre_hall=self.theatre_hall,
+            show_time=timezone.now() + timezone.timedelta(days=1),
+        )
+        other_ticket = Ticket.objects.create(row=2, seat=2, performance=other)
+        data = {
+            "performance": self.performance.id,
+            "tickets": [self.ticket1.id, other_ticket.id],
+        }
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tickets", response.data)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_create_reservation_unknown_ticket(self):
+        """Test unknown ticket ids are rejected."""
+        data = {
+            "performance": self.performance.id,
+            "tickets": [self.ticket1.id, 999999],
+        }
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tickets", response.data)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_partial_update_reservation_without_tickets(self):
+        """Test a PATCH that leaves the tickets alone keeps them attached."""
+        reservation = Reservation.objects.create(user=self.user, performance=self.performance)
+        reservation.tickets.add(self.ticket1)
+        url = reverse("theatre:reservation-detail", args=[reservation.id])
+
+        response = self.client.patch(url, {"performance": self.performance.id}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["tickets"], [self.ticket1.id])
+
+    def test_update_reservation_tickets(self):
+        """Test a PUT keeps resent tickets, attaches new ones and releases the rest."""
+        ticket3 = Ticket.objects.create(row=1, seat=3, performance=self.performance)
+        reservation = Reservation.objects.create(user=self.user, performance=self.performance)
+        reservation.tickets.add(self.ticket1, self.ticket2)
+        url = reverse("theatre:reservation-detail", args=[reservation.id])
+        data = {
+            "performance": self.performance.id,
+            "tickets": [self.ticket1.id, ticket3.id],
+        }
+
+        response = self.client.put(url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data["tickets"]), [self.ticket1.id, ticket3.id])
+        self.ticket2.refresh_from_db()
+        ticket3.refresh_from_db()
+        self.assertIsNone(self.ticket2.reservation)
+        self.assertIsNone(self.ticket2.user)
+        self.assertEqual(ticket3.user, self.user)
+
     def test_create_reservation_unauthenticated(self):
         """Test that unauthenticated user cannot create a reservation."""
         self.client.force_authenticate(user=None)
@@ -345,6 +684,37 @@ class TicketAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Ticket.objects.count(), 1)
 
+    def test_ticket_creation_updates_tickets_sold(self):
+        """Test creating and deleting tickets keeps the sold counter in sync."""
+        ticket = Ticket.objects.create(row=1, seat=1, performance=self.performance)
+        Ticket.objects.create(row=1, seat=2, performance=self.performance)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 2)
+        self.assertEqual(self.performance.tickets_available, 48)
+
+        ticket.delete()
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 1)
+
+    def test_ticket_delete_with_stale_tickets_sold(self):
+        """Test deleting a ticket does not push a drifted counter below zero."""
+        ticket = Ticket.objects.create(row=1, seat=1, performance=self.performance)
+        Performance.objects.filter(pk=self.performance.pk).update(tickets_sold=0)
+
+        ticket.delete()
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 0)
+
+    def test_ticket_bulk_create_updates_tickets_sold(self):
+        """Test bulk-created tickets are counted as sold."""
+        Ticket.objects.bulk_create(
+            [Ticket(row=1, seat=seat, performance=self.performance) for seat in (1, 2, 3)]
+        )
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 3)
+
     def test_ticket_creation_reserved_seat(self):
         """Test creating a ticket for a seat that is already reserved."""
         Ticket.objects.create(row=1, seat=1, performance=self.performance)
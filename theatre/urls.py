@@ -11,7 +11,7 @@ from theatre.views import (
     GenreViewSet
 )
 
-router = routers.DefaultRouter()
+router = routers.SimpleRouter()
 router.register("plays", PlayViewSet)
 router.register("actors", ActorViewSet)
 router.register("theatre_halls", TheatreHallViewSet)
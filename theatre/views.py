@@ -1,13 +1,20 @@
-from django.db.models import F, Count
-from django.utils import dateparse
+import hashlib
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, F, Max, Prefetch, Sum
+from django.utils import dateparse, timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
+from theatre.caching import CachedListMixin, CachedListResponseMixin
 from theatre.models import (
     TheatreHall,
     Actor,
@@ -33,92 +40,164 @@ from theatre.serializers import (
 )
 
 
-class ReservationPagination(PageNumberPagination):
+_PERF_LIST_PARAMS = [
+    OpenApiParameter(
+        name="play",
+        type=str,
+        description="Filter by play ID",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="theatre_hall",
+        type=str,
+        description="Filter by theatre hall ID",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="date",
+        type=str,
+        description="Filter by show date (YYYY-MM-DD)",
+        required=False,
+    ),
+]
+
+
+class ReservationPagination(CursorPagination):
     page_size = 10
     max_page_size = 100
+    ordering = "-id"
 
 
-class TheatreHallViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
+class TheatreHallViewSet(CachedListResponseMixin, mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
     queryset = TheatreHall.objects.all()
     serializer_class = TheatreHallSerializer
 
 
-class ActorViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
+class ActorViewSet(CachedListResponseMixin, mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
 
 
-class GenreViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
+class GenreViewSet(CachedListResponseMixin, mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
 
 
-class PlayViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
+class PlayViewSet(CachedListMixin, mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
     queryset = Play.objects.all().order_by("title")
     serializer_class = PlaySerializer
 
+    def get_queryset(self):
+        return self.queryset.prefetch_related(
+            Prefetch(
+                "actors",
+                queryset=Actor.objects.only("id", "first_name", "last_name"),
+            ),
+            Prefetch("genres", queryset=Genre.objects.only("id", "name")),
+        )
+
+
+def _performance_list_filters(query_params) -> dict:
+    """Translate list query parameters into filter kwargs; ValueError if one is invalid."""
+    play_id = query_params.get("play")
+    theatre_hall_id = query_params.get("theatre_hall")
+    date = query_params.get("date")
+
+    filters = {}
+    if date:
+        try:
+            # None for malformed input, ValueError for impossible dates.
+            parsed_date = dateparse.parse_date(date)
+        except ValueError:
+            parsed_date = None
+        if parsed_date is None:
+            raise ValueError("Invalid date format.")
+        day_start = timezone.make_aware(datetime.combine(parsed_date, time.min))
+        filters["show_time__gte"] = day_start
+        filters["show_time__lt"] = day_start + timedelta(days=1)
+    for param, field, value in (
+        ("play", "play_id", play_id),
+        ("theatre_hall", "theatre_hall_id", theatre_hall_id),
+    ):
+        if value:
+            try:
+                filters[field] = int(value)
+            except ValueError:
+                raise ValueError(f"Invalid {param} id.") from None
+    return filters
+
+
+def _performance_list_etag(request, *args, **kwargs):
+    try:
+        filters = _performance_list_filters(request.GET)
+    except ValueError:
+        return None
+    state = Performance.objects.filter(**filters).aggregate(
+        updated_at=Max("updated_at"), count=Count("id"), tickets_sold=Sum("tickets_sold")
+    )
+    key = f"{request.build_absolute_uri()}|{sorted(state.items())}"
+    return hashlib.md5(key.encode()).hexdigest()
 
+
+def _performance_state(request, pk):
+    """Read the conditional-request validators once per request."""
+    if not hasattr(request, "_performance_state"):
+        try:
+            state = (
+                Performance.objects.filter(pk=pk)
+                .values_list("updated_at", "tickets_sold")
+                .first()
+            )
+        except (TypeError, ValueError):
+            state = None
+        request._performance_state = state
+    return request._performance_state
+
+
+def _performance_detail_etag(request, pk=None, *args, **kwargs):
+    state = _performance_state(request, pk)
+    if state is None:
+        return None
+    return hashlib.md5(repr(state).encode()).hexdigest()
+
+
+def _performance_last_modified(request, pk=None, *args, **kwargs):
+    state = _performance_state(request, pk)
+    return state[0] if state else None
+
+
+@method_decorator(condition(etag_func=_performance_list_etag), name="list")
+@method_decorator(
+    condition(
+        etag_func=_performance_detail_etag,
+        last_modified_func=_performance_last_modified,
+    ),
+    name="retrieve",
+)
 class PerformanceViewSet(viewsets.ModelViewSet):
     queryset = Performance.objects.all()
     serializer_class = PerformanceSerializer
     permission_classes = [IsAdminAllORAuthenticatedORReadOnly]
 
-    @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name="play",
-                type=str,
-                description="Filter by play ID",
-                required=False,
-            ),
-            OpenApiParameter(
-                name="theatre_hall",
-                type=str,
-                description="Filter by theatre hall ID",
-                required=False,
-            ),
-            OpenApiParameter(
-                name="date",
-                type=str,
-                description="Filter by show date (YYYY-MM-DD)",
-                required=False,
-            ),
-        ]
-    )
+    @extend_schema(parameters=_PERF_LIST_PARAMS)
     def list(self, request, *args, **kwargs):
         """Retrieve a list of performances with optional filters."""
-        queryset = self.queryset.select_related("play", "theatre_hall").annotate(
-            tickets_available=F("theatre_hall__capacity") - Count("tickets")
-        )
-
-        play_id = request.query_params.get("play")
-        theatre_hall_id = request.query_params.get("theatre_hall")
-        date = request.query_params.get("date")
-
-        if play_id:
-            queryset = queryset.filter(play_id=play_id)
-        if theatre_hall_id:
-            queryset = queryset.filter(theatre_hall_id=theatre_hall_id)
-        if date:
-            try:
-                parsed_date = dateparse.parse_date(date)
-                if parsed_date is None:
-                    raise ValueError
-            except ValueError:
-                return Response({"error": "Invalid date format."}, status=400)
+        try:
+            filters = _performance_list_filters(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
 
-        serializer = self.get_serializer(queryset.order_by("id"), many=True)
+        queryset = self.get_queryset()
+        if filters:
+            queryset = queryset.filter(**filters)
+        queryset = queryset.order_by("id")
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
-    def retrieve(self, request, *args, **kwargs):
-        """Retrieve details of a specific performance along with occupied seats."""
-        instance = self.get_object()
-        taken_places = Ticket.objects.filter(performance=instance).values("row", "seat")
-        serializer = self.get_serializer(instance)
-        data = serializer.data
-        data["taken_places"] = list(taken_places)
-        return Response(data)
-
     @action(
         methods=["POST"],
         detail=True,
@@ -127,7 +206,10 @@ class PerformanceViewSet(viewsets.ModelViewSet):
     )
     def upload_image(self, request, pk=None):
         """Upload an image for a specific performance."""
-        performance = self.get_object()
+        performance = get_object_or_404(
+            Performance.objects.only("id", "image", "updated_at"), pk=pk
+        )
+        self.check_object_permissions(request, performance)
         serializer = PerformanceImageSerializer(performance, data=request.data)
         serializer.is_valid(
             raise_exception=True)
@@ -136,6 +218,33 @@ class PerformanceViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def get_queryset(self):
+        queryset = self.queryset
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.select_related("play", "theatre_hall").annotate(
+                play_title=F("play__title"),
+                theatre_hall_name=F("theatre_hall__name"),
+            )
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "tickets",
+                    queryset=Ticket.objects.only("row", "seat", "performance_id"),
+                )
+            )
+        if self.action == "list":
+            queryset = queryset.only(
+                "id",
+                "show_time",
+                "image",
+                "tickets_sold",
+                "play__title",
+                "theatre_hall__name",
+                "theatre_hall__rows",
+                "theatre_hall__seats_in_row",
+            )
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "list":
             return PerformanceListSerializer
@@ -154,10 +263,40 @@ class TicketViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter tickets by authenticated user."""
-        queryset = self.queryset.filter(reservation__user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == "list":
+            queryset = queryset.select_related("performance__play").only(
+                "id",
+                "row",
+                "seat",
+                "performance",
+                "performance__play",
+                "performance__play__title",
+            )
+        else:
+            queryset = queryset.select_related("performance__play", "performance__theatre_hall")
         return queryset
 
 
+def _tickets_by_reservation(reservation_ids: list[int]) -> dict[int, list[dict]]:
+    """Group ticket rows by reservation without instantiating models."""
+    tickets = {}
+    rows = Ticket.objects.filter(reservation_id__in=reservation_ids).values_list(
+        "reservation_id", "id", "row", "seat", "performance_id", "performance__play__title"
+    )
+    for reservation_id, ticket_id, row, seat, performance_id, title in rows:
+        tickets.setdefault(reservation_id, []).append(
+            {
+                "id": ticket_id,
+                "row": row,
+                "seat": seat,
+                "performance": performance_id,
+                "performance_title": title,
+            }
+        )
+    return tickets
+
+
 class ReservationViewSet(viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
@@ -166,12 +305,14 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Retrieve reservations for the authenticated user."""
-        return self.queryset.filter(user=self.request.user).prefetch_related("tickets")
+        return self.queryset.filter(user=self.request.user).order_by("-id")
 
     def perform_create(self, serializer):
         """Create a new reservation for the authenticated user."""
         try:
             serializer.save(user=self.request.user)
+        except ValidationError:
+            raise
         except Exception as e:
             raise ValidationError(f"Error creating reservation: {str(e)}")
 
@@ -182,12 +323,19 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
     def list(self, request, *args, **kwargs):
         """Retrieve a list of reservations for the authenticated user."""
-        queryset = self.get_queryset()
+        queryset = self.get_queryset().values("id", "created_at")
         page = self.paginate_queryset(queryset)
+        reservations = list(queryset) if page is None else page
+
+        tickets = _tickets_by_reservation(
+            [reservation["id"] for reservation in reservations]
+        )
+        for reservation in reservations:
+            reservation["tickets"] = tickets.get(reservation["id"], [])
+
+        serializer = self.get_serializer(reservations, many=True)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
     def perform_destroy(self, instance: Reservation) -> None:
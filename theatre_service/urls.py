@@ -18,6 +18,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
+from django.views.decorators.cache import cache_page
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
@@ -30,7 +31,11 @@ urlpatterns = [
     path("api/theatres/", include("theatre.urls", namespace="theatre")),
     path("api/users/", include("user.urls", namespace="user")),
     path("__debug__/", include("debug_toolbar.urls")),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path(
+        "api/schema/",
+        cache_page(60 * 60)(SpectacularAPIView.as_view()),
+        name="schema",
+    ),
     path("api/doc/swagger/", SpectacularSwaggerView.as_view(
         url_name="schema"
     ), name="swagger-ui"),